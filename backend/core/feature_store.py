@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import logging
 from typing import Dict, Any, List
 from .domain_model import domain_mgr
@@ -12,22 +13,40 @@ class FeatureStore:
     Enforces Article III: The Wall of Now.
     """
     
-    def build_master_table(self) -> pd.DataFrame:
+    def fetch_master_inputs(self) -> Dict[str, Any]:
+        """
+        Everything build_master_table() reads from the Universal Graph, as plain rows.
+        """
+        # 1. Fetch Schema Maps (The Rosetta Stone)
+        # Maps Client Column -> System Anchor
+        inputs = {
+            "product_map": domain_mgr.get_anchor_map("PRODUCT"),
+            "trx_map": domain_mgr.get_anchor_map("TRANSACTION"),
+            "pricing_map": domain_mgr.get_anchor_map("PRICING"),
+            # 2. Fetch Raw Data
+            "products": domain_mgr.get_objects("PRODUCT"),
+            "sales_events": domain_mgr.get_events("SALES_QTY", limit=10000),
+            "derived_fields": None,
+        }
+        # Query schema_registry for fields with formulas
+        try:
+            inputs["derived_fields"] = domain_mgr.get_derived_fields()
+        except Exception as e:
+            logger.warning(f"⚠️ [FORMULA] Could not fetch derived fields: {e}")
+        return inputs
+
+    def build_master_table(self, inputs: Dict[str, Any] = None) -> pd.DataFrame:
         """
         Assembles the training dataset by joining Objects + Events
         using the Constitutional Anchors.
+        Pass `inputs` from fetch_master_inputs() to avoid re-reading the DB.
         """
         logger.info("🏗️ [SENSOR] Building Master Table from Metadata...")
-        
-        # 1. Fetch Schema Maps (The Rosetta Stone)
-        # Maps Client Column -> System Anchor
-        product_map = domain_mgr.get_anchor_map("PRODUCT")
-        trx_map = domain_mgr.get_anchor_map("TRANSACTION")
-        pricing_map = domain_mgr.get_anchor_map("PRICING")
-        
-        # 2. Fetch Raw Data
-        products = domain_mgr.get_objects("PRODUCT")
-        sales_events = domain_mgr.get_events("SALES_QTY", limit=10000)
+        if inputs is None:
+            inputs = self.fetch_master_inputs()
+        product_map = inputs["product_map"]
+        products = inputs["products"]
+        sales_events = inputs["sales_events"]
         
         if not products or not sales_events:
             logger.warning("⚠️ [SENSOR] Empty data universe.")
@@ -79,7 +98,11 @@ class FeatureStore:
         full_df['LAG_1'] = full_df.groupby(Anchors.PRODUCT_ID)[Anchors.SALES_QTY].shift(1)
         
         # MA 7: Moving Average (if daily data)
-        full_df['MA_7'] = full_df.groupby(Anchors.PRODUCT_ID)[Anchors.SALES_QTY].transform(lambda x: x.shift(1).rolling(window=7).mean())
+        # Rolled over LAG_1 (already shifted) in one grouped call instead of a Python lambda per product
+        full_df['MA_7'] = (
+            full_df.groupby(Anchors.PRODUCT_ID)['LAG_1'].rolling(window=7).mean()
+            .reset_index(level=0, drop=True)
+        )
         
         # 7. Handle STATE Variables (Price, Stock)
         # CRITICAL: Stock on Hand is "Opening Stock" (Current State) - DO NOT SHIFT
@@ -95,9 +118,8 @@ class FeatureStore:
              logger.warning("⚠️ [SENSOR] Price Anchor missing in Product Master.")
         
         # 8. Execute Derived Field Formulas
-        # Query schema_registry for fields with formulas
         try:
-            derived_fields = domain_mgr.get_derived_fields()
+            derived_fields = inputs["derived_fields"]
             if derived_fields:
                 logger.info(f"🧮 [FORMULA] Executing {len(derived_fields)} derived field formulas...")
                 for field in derived_fields:
@@ -129,11 +151,27 @@ class FeatureStore:
                             # Create column with zeros if formula fails
                             full_df[anchor_name] = 0
         except Exception as e:
-            logger.warning(f"⚠️ [FORMULA] Could not fetch derived fields: {e}")
+            logger.warning(f"⚠️ [FORMULA] Could not apply derived fields: {e}")
              
         logger.info(f"✅ [SENSOR] Master Table Ready: {len(full_df)} rows. Anchors Aligned.")
         return full_df
 
+    def build_master_arrays(self, columns: List[str] = None, df: pd.DataFrame = None) -> Dict[str, np.ndarray]:
+        """
+        Columnar view of the Master Table: {column: float32 ndarray}.
+        Lets numeric consumers (ML Engine) skip pandas dropna/fillna copies.
+        Pass an already-built table as `df` to avoid rebuilding it.
+        Requested columns the table lacks come back as zeros (reindex semantics, no frame copy).
+        """
+        if df is None:
+            df = self.build_master_table()
+        if columns is None:
+            columns = df.select_dtypes(include='number').columns
+        return {
+            col: df[col].to_numpy(dtype=np.float32) if col in df.columns else np.zeros(len(df), dtype=np.float32)
+            for col in columns
+        }
+
     def get_latest_features(self, node_id: str) -> pd.DataFrame:
         """Hydrates a single vector for inference."""
         # Simple implementation for V1
@@ -7,6 +7,7 @@ import uvicorn
 import os
 import time
 import logging
+import asyncio
 
 # --- SOVEREIGN CORE IMPORTS ---
 from core.local_llm import sovereign_brain
@@ -219,10 +220,10 @@ async def delete_schema(entity_type: str):
 # ==============================================================================
 
 @app.post("/ml/train")
-async def trigger_training():
+async def trigger_training(force: bool = False):
     if not ml_engine: 
         raise HTTPException(status_code=503, detail="ML Engine Offline")
-    return ml_engine.run_demand_pipeline()
+    return ml_engine.run_demand_pipeline(force=force)
 
 @app.get("/ml/predict")
 async def predict(sku: str, days: int = 7):
@@ -241,14 +242,23 @@ async def explain_forecast(sku: str):
     # We generate a forecast to get the narrative
     result = ml_engine.generate_forecast(sku)
     
-    # Return just the narrative part or a default message
-    narrative = result.get("narrative", "No explanation available.")
+    # The narrative is generated in the background; wait for it off the event loop
+    narrative = "No explanation available."
+    if result.get("narrative_id"):
+        ready = await asyncio.to_thread(ml_engine.get_narrative, result["narrative_id"], 300)
+        narrative = ready.get("narrative") or narrative
     return {
         "node_id": sku,
         "narrative": narrative,
         "generated_at": time.time()
     }
 
+@app.get("/ml/narrative/{narrative_id}")
+async def get_forecast_narrative(narrative_id: str):
+    """Polled by the Workbench after /ml/predict returns a narrative_id."""
+    if not ml_engine: return {"narrative_id": narrative_id, "status": "unknown", "narrative": None}
+    return ml_engine.get_narrative(narrative_id)
+
 @app.get("/ml/metrics")
 async def get_ml_metrics():
     if not ml_engine: return {}
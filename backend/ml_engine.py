@@ -2,11 +2,19 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import io
 import json
+import pickle
 import uuid
+import hashlib
+import functools
+import glob
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeout
 import logging
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 # --- CORE IMPORTS ---
 from core.feature_store import feature_store
@@ -18,17 +26,143 @@ from core.local_llm import sovereign_brain
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SOVEREIGN_ML_ENGINE")
 
+# Optional Intel oneDAL acceleration: must patch before sklearn estimators are imported
+try:
+    from sklearnex import patch_sklearn
+    patch_sklearn()
+except ImportError:
+    pass
+
 # Graceful Import for Scikit-Learn
 try:
-    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.ensemble import ExtraTreesRegressor, HistGradientBoostingRegressor
     from sklearn.linear_model import LinearRegression
-    from sklearn.model_selection import train_test_split
     from sklearn.metrics import r2_score
+    from sklearn.inspection import permutation_importance
+    from sklearn import config_context
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
     logger.warning("⚠️ Scikit-Learn not found. ML Engine running in HEURISTIC mode.")
 
+# Graceful Import for orjson (artifacts fall back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Graceful Import for ONNX (compiled champion for the forecast path)
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Graceful Import for Treelite (tree champions compiled to native code for the forecast path)
+try:
+    import treelite
+    import tl2cgen
+    TREELITE_AVAILABLE = True
+except ImportError:
+    TREELITE_AVAILABLE = False
+
+# Graceful Import for Numba (JIT tree walk: native forest predictions the moment training ends)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Analyst narratives run off the forecast path on a small pool
+MAX_PENDING_NARRATIVES = 32   # Beyond this, forecasts are served without a narrative instead of queueing
+NARRATIVE_CACHE_SIZE = 256    # Most recent narratives kept for /ml/narrative lookups
+NARRATIVE_MEMO_SIZE = 1024    # Distinct (node, trend, horizon, head, end) outlooks remembered across forecasts
+TREELITE_COMPILE_JOBS = max(1, (os.cpu_count() or 1) // 2) # Background gcc leaves cores for serving
+NARRATIVE_PROMPT = (
+    "DATA: SKU {node_id}. Demand over the next {days} days is {trend}.\n"
+    "First predictions (units/day): [{head}]\n"
+    "TASK: In 2 sentences, explain this outlook to a retail planner."
+)
+
+def _json_dumps(obj) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+def _json_loads(raw: bytes):
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+def _flush_artifacts(pending: Dict[str, Optional[bytes]]):
+    """
+    Atomic commit of a run's files (model, ONNX, JSON artifacts): every payload is written
+    to a .tmp first, then all are renamed into place in staging order, so a failure before
+    the renames leaves the previous run's files untouched and readers never see a partial.
+    A None payload removes the file. Directories are fsynced once at the end.
+    """
+    for path, payload in pending.items():
+        if payload is not None:
+            with open(path + ".tmp", 'wb') as f:
+                f.write(payload)
+    for path, payload in pending.items():
+        if payload is not None:
+            os.replace(path + ".tmp", path)
+        elif os.path.exists(path):
+            os.remove(path)
+    
+    if hasattr(os, "O_DIRECTORY"): # POSIX only; Windows cannot open directories
+        for d in {os.path.dirname(p) or "." for p in pending}:
+            fd = os.open(d, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+def _onnx_session(path: str):
+    """Single-threaded ORT session: forecasts are one row at a time, inside a web worker."""
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = 1
+    opts.inter_op_num_threads = 1
+    return ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+def _pack_forest(model):
+    """
+    Flattens a fitted sklearn forest (ExtraTrees / RandomForest) into concatenated node arrays
+    for _walk_forest. None for anything else (Linear, HistGBR) or when Numba is missing.
+    """
+    estimators = getattr(model, 'estimators_', None)
+    if not NUMBA_AVAILABLE or not estimators or not hasattr(estimators[0], 'tree_'):
+        return None
+    trees = [est.tree_ for est in estimators]
+    roots = np.cumsum([0] + [t.node_count for t in trees[:-1]]).astype(np.int32)
+    # Child ids are made global; leaves keep -1
+    left = np.concatenate([np.where(t.children_left >= 0, t.children_left + r, -1) for t, r in zip(trees, roots)]).astype(np.int32)
+    right = np.concatenate([np.where(t.children_right >= 0, t.children_right + r, -1) for t, r in zip(trees, roots)]).astype(np.int32)
+    feature = np.concatenate([t.feature for t in trees]).astype(np.int32)
+    threshold = np.concatenate([t.threshold for t in trees])
+    value = np.concatenate([t.value[:, 0, 0] for t in trees])
+    return feature, threshold, left, right, value, roots
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _walk_forest(x, feature, threshold, left, right, value, roots):
+        """Mean leaf value over all trees for one row (same <= split rule as sklearn)."""
+        total = 0.0
+        for root in roots:
+            node = root
+            while left[node] != -1:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            total += value[node]
+        return total / roots.shape[0]
+
+def _fit_score(model, X_train, y_train, X_test, y_test):
+    """Fits one tournament contender and scores it on the holdout (runs on a pool thread)."""
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return model, r2_score(y_test, y_pred), y_pred
+
 class MLEngine:
     """
     The Intelligence Engine (v9.1 - Sovereign).
@@ -38,11 +172,27 @@ class MLEngine:
     def __init__(self):
         self.db_path = domain_mgr.db_path
         self.model_path = "data/model_store.joblib"
+        self.onnx_path = "data/model_store.onnx"
         self.metrics_path = "data/model_metrics.json"
         self.audit_log_path = "data/audit_log.json"
         self.accuracy_matrix_path = "data/accuracy_matrix.json"
+        self.ingest_hash_path = "data/last_ingest.hash"
         self.model = None
+        self.onnx_sess = None
+        self.tl_predictor = None
+        self._tl_lock = threading.Lock() # Orders treelite publication against champion switches
+        self._tl_building = set() # Tags with a compile in flight (guarded by _tl_lock)
+        self._fast_trees = None # Packed forest for _walk_forest
+        self._model_tag = None
+        self._last_predictions = None
+        self._metrics_mtime = 0
+        self._artifact_cache = {} # path -> (st_mtime_ns, parsed JSON)
+        self._pending_artifacts: Dict[str, Optional[bytes]] = {} # path -> payload (None = delete), flushed once per run
         self.metrics = {"r2_score": 0, "status": "Untrained"}
+        self._narrative_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="narrative")
+        self._narratives: "OrderedDict[str, Future]" = OrderedDict()
+        self._narratives_lock = threading.Lock()
+        self._narrative_memo: "OrderedDict[tuple, str]" = OrderedDict()
         self._ensure_directories()
         self._load_model()
 
@@ -53,17 +203,50 @@ class MLEngine:
         if os.path.exists(self.model_path):
             try:
                 self.model = joblib.load(self.model_path)
+                # Online path is single-row predicts (pickles from older runs kept n_jobs=-1)
+                if hasattr(self.model, 'n_jobs'): self.model.n_jobs = 1
             except: self.model = None
-        if os.path.exists(self.metrics_path):
+        self._fast_trees = _pack_forest(self.model)
+        if ONNX_AVAILABLE and os.path.exists(self.onnx_path):
             try:
-                with open(self.metrics_path, 'r') as f: self.metrics = json.load(f)
-            except: pass
+                self.onnx_sess = _onnx_session(self.onnx_path)
+            except Exception as e:
+                logger.warning(f"⚠️ [ML] ONNX model not loaded, forecasting via sklearn: {e}")
+        try:
+            # mtime first, so a corrupt file isn't re-parsed until it changes
+            self._metrics_mtime = os.stat(self.metrics_path).st_mtime_ns
+            with open(self.metrics_path, 'rb') as f: self.metrics = _json_loads(f.read())
+        except FileNotFoundError:
+            pass
+        except ValueError as e: # JSONDecodeError (stdlib and orjson)
+            logger.warning(f"⚠️ [ML] Ignoring unreadable metrics artifact: {e}")
+        self._bind_feature_lanes(self.metrics.get("features"))
+        tag = self.metrics.get("model_tag")
+        with self._tl_lock:
+            self._model_tag = tag
+            self.tl_predictor = None # A previous champion's library must not serve this one
+            if TREELITE_AVAILABLE and tag and os.path.exists(self._treelite_lib(tag)):
+                try:
+                    self.tl_predictor = tl2cgen.Predictor(self._treelite_lib(tag), nthread=1)
+                except Exception as e:
+                    logger.warning(f"⚠️ [ML] Treelite library not loaded: {e}")
+    
+    def _bind_feature_lanes(self, features: Optional[List[str]]):
+        """Resolves the forecast's input columns once, from the champion's training order."""
+        features = features or [Anchors.RETAIL_PRICE, 'LAG_1', 'MA_7'] # Order used before it was persisted
+        self._feat_idx_price = features.index(Anchors.RETAIL_PRICE)
+        self._feat_idx_lag = features.index('LAG_1')
+        self._feat_idx_ma = features.index('MA_7')
+
+    def _treelite_lib(self, model_tag: str) -> str:
+        # One file per champion: dlopen caches by path, so a rebuilt library must not reuse the name
+        return f"data/model_store.{model_tag}.so"
 
     # ==============================================================================
     # 🧠 MAIN PIPELINE
     # ==============================================================================
 
-    def run_demand_pipeline(self):
+    def run_demand_pipeline(self, force: bool = False):
         """
         MASTER ORCHESTRATOR:
         1. Ingest Data via Sensor (Feature Store)
@@ -71,12 +254,15 @@ class MLEngine:
         3. Dynamic Capability Switching (NPI / Censoring)
         4. Model Tournament
         5. Hierarchical Accuracy
+        Skips steps 2-5 when the Master Table is unchanged since the last successful run (unless forced).
         """
         if not SKLEARN_AVAILABLE:
             return {"status": "error", "message": "Scikit-Learn missing"}
 
         logger.info("🧠 [ML] Starting Sovereign Intelligence Pipeline...")
         run_id = f"RUN-{uuid.uuid4().hex[:8].upper()}"
+        run_ts = datetime.now().isoformat() # One timestamp shared by every artifact of this run
+        self._pending_artifacts = {}
 
         try:
             # --- STEP 1: LOAD DATA ---
@@ -84,6 +270,19 @@ class MLEngine:
             
             if df.empty or len(df) < 10:
                 return {"status": "skipped", "message": "Insufficient data"}
+            
+            # Same rows as the last successful run -> same champion and artifacts; don't recompute.
+            # Hashed on the table just assembled from the current rows
+            ingest_hash = self._hash_master_table(df)
+            if not force and os.path.exists(self.model_path):
+                try:
+                    with open(self.ingest_hash_path) as f: last_hash = f.read().strip()
+                except FileNotFoundError:
+                    last_hash = None
+                if ingest_hash == last_hash:
+                    logger.info("⏭️ [ML] Master Table unchanged since last run. Skipping pipeline.")
+                    return {"status": "skipped", "reason": "unchanged",
+                            "message": "Master Table unchanged since last run", "metrics": self.metrics}
 
             # --- STEP 2: ABSTENTION GUARD (Article IV) ---
             # "If the senses lie, intelligence collapses."
@@ -107,7 +306,10 @@ class MLEngine:
                 # df = df[df[Anchors.STOCK_ON_HAND] > 0] # Simplified Censoring
 
             # --- STEP 4: TOURNAMENT ---
-            train_result = self._run_tournament(df)
+            # Features: We use the Anchors + lags, plus dynamic features if they exist.
+            # Resolved once so the tournament and the accuracy matrix can't diverge.
+            features = [Anchors.RETAIL_PRICE, 'LAG_1', 'MA_7'] + [c for c in df.columns if c.startswith("feat_")]
+            train_result, champion = self._run_tournament(df, features, run_ts)
             
             # --- STEP 5: DYNAMIC HIERARCHY ---
             # Fetch the levels defined by the User (Schema Registry)
@@ -129,11 +331,39 @@ class MLEngine:
             # But strict hierarchy might use unmapped attributes. 
             # For Safety in V2, we try to use Anchors if mapped, else source names.
             
-            accuracy_matrix = self._calculate_hierarchical_accuracy(df, levels)
+            accuracy_matrix = self._calculate_hierarchical_accuracy(df, levels, features)
             
             # Save Artifacts
-            with open(self.accuracy_matrix_path, 'w') as f:
-                json.dump(accuracy_matrix, f)
+            self._stage_artifact(self.accuracy_matrix_path, accuracy_matrix)
+            
+            # Glass Box: what the run saw and why the champion won
+            usable = df[[Anchors.SALES_QTY, Anchors.RETAIL_PRICE]].notna().all(axis=1)
+            audit_artifact = {
+                "run_id": run_id,
+                "generated_at": run_ts,
+                "data_health": {
+                    "score": int(usable.mean() * 100),
+                    "log": [
+                        f"{len(df)} rows ingested, {int(usable.sum())} usable for training.",
+                        "Inventory physics detected: censored demand logic enabled." if has_stock
+                        else "No stock anchor: sales treated as true demand."
+                    ]
+                },
+                "model_transparency": {
+                    "features_used": features,
+                    "tournament_scoreboard": train_result["scoreboard"]
+                },
+                "drivers": train_result["drivers"]
+            }
+            self._stage_artifact(self.audit_log_path, audit_artifact)
+            
+            # One coalesced commit for every file of the run (and the ingest hash that vouches for them);
+            # only then does this process start serving the new champion
+            self._pending_artifacts[self.ingest_hash_path] = ingest_hash.encode()
+            _flush_artifacts(self._pending_artifacts)
+            self._pending_artifacts = {}
+            self._metrics_mtime = os.stat(self.metrics_path).st_mtime_ns
+            self._activate_champion(champion)
 
             logger.info(f"✅ [ML] Pipeline Complete. Run ID: {run_id}. R2: {train_result.get('r2_score')}")
             
@@ -150,59 +380,205 @@ class MLEngine:
             traceback.print_exc()
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    def _hash_master_table(df: pd.DataFrame) -> str:
+        """Content hash of the Master Table (column names + row values; index ignored)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update("|".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    def _stage_artifact(self, path: str, obj):
+        """Serializes now; the write happens in the single flush at the end of the run."""
+        self._pending_artifacts[path] = _json_dumps(obj)
+
     # ==============================================================================
     # 🥊 THE TOURNAMENT
     # ==============================================================================
 
-    def _run_tournament(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _run_tournament(self, df: pd.DataFrame, features: List[str], run_ts: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         """Trains competing models and selects the champion."""
-        
-        # Features: We use the Anchors + lags
-        features = [Anchors.RETAIL_PRICE, 'LAG_1', 'MA_7']
-        # Add dynamic features if they exist
-        for col in df.columns:
-            if col.startswith("feat_"): features.append(col)
-            
         target = Anchors.SALES_QTY
         
+        # Stay in numpy from here: one float32 buffer per column, no BlockManager copies
+        arrays = feature_store.build_master_arrays(features + [target], df=df)
+        X_full = np.stack([arrays[c] for c in features], axis=1)
+        np.nan_to_num(X_full, copy=False) # In place on the buffer we own
+        
         # Robustness
-        train_df = df.dropna(subset=[target, Anchors.RETAIL_PRICE])
-        X = train_df[features].fillna(0)
-        y = train_df[target]
+        train_idx = np.flatnonzero(~(np.isnan(arrays[target]) | np.isnan(arrays[Anchors.RETAIL_PRICE])))
+        if Anchors.TX_DATE in df.columns:
+            # Chronological order, so the holdout is the most recent 20% (no look-ahead leakage)
+            train_idx = train_idx[np.argsort(df[Anchors.TX_DATE].to_numpy()[train_idx], kind='stable')]
+        if len(train_idx) == len(X_full) and (train_idx[1:] > train_idx[:-1]).all():
+            X, y = X_full, arrays[target] # Already clean and chronological: the split below is pure views
+        else:
+            X = X_full[train_idx]
+            y = arrays[target][train_idx]
 
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # 1. Random Forest
-        rf_model = RandomForestRegressor(n_estimators=100, max_depth=12, random_state=42)
-        rf_model.fit(X_train, y_train)
-        rf_r2 = r2_score(y_test, rf_model.predict(X_test))
+        # Time-ordered split: contiguous views instead of a shuffled copy
+        split_idx = int(len(X) * 0.8)
+        X_train, X_test = X[:split_idx], X[split_idx:]
+        y_train, y_test = y[:split_idx], y[split_idx:]
         
+        # Contenders are independent, so they train side by side on threads (the fits run in
+        # GIL-free C/Cython/BLAS; no worker-process spawn, no pickling of X or the fitted models):
+        # 1. Extra Trees (random splits, no bootstrap: cheaper than RF; also parallel across its own trees)
         # 2. Linear Regression
-        lr_model = LinearRegression()
-        lr_model.fit(X_train, y_train)
-        lr_r2 = r2_score(y_test, lr_model.predict(X_test))
+        # 3. Histogram Gradient Boosting (binned split finding, far cheaper than RF on wide data)
+        contenders = {
+            "ExtraTrees": (ExtraTreesRegressor(n_estimators=50, max_depth=10, bootstrap=False, n_jobs=-1, random_state=42), X_train),
+            "Linear": (LinearRegression(), np.asfortranarray(X_train)), # LAPACK prefers column-major
+            "HistGBR": (HistGradientBoostingRegressor(max_iter=200, max_depth=8, learning_rate=0.05, early_stopping=True, random_state=42), X_train)
+        }
+        with ThreadPoolExecutor(max_workers=len(contenders), thread_name_prefix="tournament") as pool:
+            futures = {name: pool.submit(_fit_score, m, X_fit, y_train, X_test, y_test) for name, (m, X_fit) in contenders.items()}
+            fitted = {name: f.result() for name, f in futures.items()}
         
-        winner_model = rf_model # Default to RF
-        winner_score = rf_r2
+        # Champion = best holdout R2
+        winner_name = max(fitted, key=lambda name: fitted[name][1])
+        winner_model, winner_score, holdout_pred = fitted[winner_name]
         
-        joblib.dump(winner_model, self.model_path)
-        self.model = winner_model
+        # Score the full frame once here, across all cores; the accuracy matrix reuses it instead of re-predicting.
+        # Holdout rows already have the winner's predictions, so only the rest are predicted again
+        test_rows = train_idx[split_idx:]
+        rest = np.ones(len(X_full), dtype=bool)
+        rest[test_rows] = False
+        predictions = np.empty(len(X_full), dtype=holdout_pred.dtype)
+        predictions[test_rows] = holdout_pred
+        if rest.any(): predictions[rest] = winner_model.predict(X_full[rest])
+        self._last_predictions = predictions
+        # From here on it serves single-row forecasts, so persist it single-threaded
+        if hasattr(winner_model, 'n_jobs'): winner_model.n_jobs = 1
         
-        self.metrics = {
+        # Identity tag of this champion; an identical retrain skips the (multi-MB) pickle
+        model_tag = hashlib.blake2b(
+            repr((features, winner_name, round(winner_score, 6), len(df), df.index.max())).encode(),
+            digest_size=8
+        ).hexdigest()
+        # Model files are staged with the JSON artifacts and committed together at the end of the run
+        if model_tag != self.metrics.get("model_tag") or not os.path.exists(self.model_path):
+            # Uncompressed: cold-start _load_model reads the tree arrays straight back, no inflate pass
+            buf = io.BytesIO()
+            joblib.dump(winner_model, buf, compress=0, protocol=pickle.HIGHEST_PROTOCOL)
+            self._pending_artifacts[self.model_path] = buf.getvalue()
+        else:
+            logger.info(f"💾 [ML] Champion unchanged ({model_tag}), keeping persisted model.")
+        # No ONNX build for this champion removes the old file: never serve a stale champion
+        self._pending_artifacts[self.onnx_path] = self._compile_onnx(winner_model)
+        
+        metrics = {
             "r2_score": round(winner_score, 3), 
             "status": "Active", 
-            "last_trained": datetime.now().isoformat()
+            "model": winner_name, 
+            "last_trained": run_ts,
+            "model_tag": model_tag,
+            "features": features
         }
-        with open(self.metrics_path, 'w') as f:
-            json.dump(self.metrics, f)
+        self._stage_artifact(self.metrics_path, metrics)
+        
+        # Champion's feature importances for the Glass Box. HistGBR / Linear have no impurity
+        # importances, so they get permutation importances on the holdout (normalized the same way)
+        importances = getattr(winner_model, 'feature_importances_', None)
+        if importances is None and len(X_test) > 1:
+            perm = permutation_importance(winner_model, X_test, y_test, n_repeats=5, random_state=42, n_jobs=1)
+            importances = np.clip(perm.importances_mean, 0, None)
+            if importances.sum() > 0: importances = importances / importances.sum()
+        drivers = {f: round(float(w), 3) for f, w in zip(features, importances)} if importances is not None else {}
             
-        return {
+        train_result = {
             "features": features,
+            "drivers": drivers,
             "r2_score": round(winner_score, 3),
-            "scoreboard": {"Random Forest": round(rf_r2, 3), "Linear": round(lr_r2, 3)}
+            "winner": winner_name,
+            "scoreboard": {name: round(r2, 3) for name, (_, r2, _) in fitted.items()}
         }
+        champion = {"model": winner_model, "model_tag": model_tag, "metrics": metrics}
+        return train_result, champion
+
+    def _activate_champion(self, champion: Dict[str, Any]):
+        """Serves the run's champion in this process; called only after its files are committed."""
+        model = champion["model"]
+        with self._tl_lock:
+            self._model_tag = champion["model_tag"]
+            self.tl_predictor = None # A previous champion's library must not serve this one
+        self.model = model
+        self._fast_trees = _pack_forest(model)
+        self.metrics = champion["metrics"]
+        self._bind_feature_lanes(self.metrics["features"])
+        self.onnx_sess = None
+        if ONNX_AVAILABLE and os.path.exists(self.onnx_path):
+            try:
+                self.onnx_sess = _onnx_session(self.onnx_path)
+            except Exception as e:
+                logger.warning(f"⚠️ [ML] ONNX model not loaded, forecasting via sklearn: {e}")
+        self._export_treelite(model, self._model_tag)
+
+    def _compile_onnx(self, model) -> Optional[bytes]:
+        """Compiles the champion to ONNX so single-row forecasts skip sklearn's per-call overhead."""
+        if not ONNX_AVAILABLE: return None
+        try:
+            onx = convert_sklearn(model, initial_types=[('X', FloatTensorType([None, model.n_features_in_]))])
+            return onx.SerializeToString()
+        except Exception as e:
+            logger.warning(f"⚠️ [ML] ONNX export skipped, forecasting via sklearn: {type(e).__name__}: {str(e)[:200]}")
+            return None
+
+    def _export_treelite(self, model, model_tag: str):
+        """
+        Compiles tree champions (ExtraTrees / HistGBR) to a native library with quantized thresholds.
+        A deep forest takes minutes in gcc, so it builds in the background; forecasts use
+        ONNX / sklearn until the library is ready.
+        """
+        if not TREELITE_AVAILABLE: return
+        libpath = self._treelite_lib(model_tag)
+        if os.path.exists(libpath): # Same champion (or built by another worker): just load it
+            try:
+                self._publish_treelite(model_tag)
+            except Exception as e:
+                logger.warning(f"⚠️ [ML] Treelite library not loaded: {e}")
+            return
+        try:
+            tl_model = treelite.sklearn.import_model(model)
+        except Exception:
+            return # Not a tree ensemble (e.g. Linear)
+        with self._tl_lock:
+            if model_tag in self._tl_building: return # A retrain inside the compile window: one build per tag
+            self._tl_building.add(model_tag)
+        
+        def build():
+            tmp = libpath + ".tmp"
+            try:
+                tl2cgen.export_lib(tl_model, toolchain="gcc", libpath=tmp,
+                                   params={"quantize": 1, "parallel_comp": TREELITE_COMPILE_JOBS})
+                if self._publish_treelite(model_tag, tmp):
+                    logger.info(f"⚡ [ML] Treelite champion ready: {libpath}")
+            except Exception as e:
+                logger.warning(f"⚠️ [ML] Treelite compile skipped: {type(e).__name__}: {str(e)[:200]}")
+            finally:
+                with self._tl_lock:
+                    self._tl_building.discard(model_tag)
+        
+        threading.Thread(target=build, name="treelite-compile", daemon=True).start()
+
+    def _publish_treelite(self, model_tag: str, tmp: Optional[str] = None) -> bool:
+        """
+        Moves a freshly built library into place and serves it, unless a newer champion took over
+        meanwhile. Libraries of other champions are removed only after the new one is in place.
+        """
+        libpath = self._treelite_lib(model_tag)
+        with self._tl_lock:
+            if self._model_tag != model_tag: # Superseded while compiling
+                if tmp: os.remove(tmp)
+                return False
+            if tmp: os.replace(tmp, libpath)
+            self.tl_predictor = tl2cgen.Predictor(libpath, nthread=1)
+            keep = {libpath, self._treelite_lib(self._model_tag)}
+            for stale in glob.glob("data/model_store.*.so"):
+                if stale not in keep: os.remove(stale)
+        return True
 
-    def _calculate_hierarchical_accuracy(self, df: pd.DataFrame, levels: List[str]) -> List[Dict]:
+    def _calculate_hierarchical_accuracy(self, df: pd.DataFrame, levels: List[str], features: List[str]) -> List[Dict]:
         """
         [UPGRADED] Generates the 'Accuracy Matrix' with Time Dimension.
         Aggregates forecasts based on User-Defined Hierarchy AND Time Buckets.
@@ -215,66 +591,85 @@ class MLEngine:
             date_col = 'transaction_date' 
         
         # Convert to datetime and extract Week
+        # Buckets are integer '%Y-W%U' keys (YYYYWW, Sunday-start weeks) so no per-row strftime;
+        # labels are rendered once per distinct week when the matrix is serialized.
+        period_labels = None
         try:
             df['encoded_date'] = pd.to_datetime(df[date_col])
-            df['period'] = df['encoded_date'].dt.strftime('%Y-W%U') # Weekly Bucket
+            sunday_dow = (df['encoded_date'].dt.dayofweek + 1) % 7
+            df['period'] = df['encoded_date'].dt.year * 100 + (df['encoded_date'].dt.dayofyear - 1 + 7 - sunday_dow) // 7
+            period_labels = {k: f"{int(k) // 100}-W{int(k) % 100:02d}" for k in df['period'].dropna().unique()}
         except:
             df['period'] = 'Global'
 
-        features = [Anchors.RETAIL_PRICE, 'LAG_1', 'MA_7']
-        # Add dynamic features
-        for col in df.columns:
-             if col.startswith("feat_"): features.append(col)
-        
         # Generate Predictions at Lowest Level (Product x Time)
-        X = df[features].fillna(0)
-        if hasattr(self.model, 'predict'):
+        if self._last_predictions is not None and len(self._last_predictions) == len(df):
+            df['predicted_qty'] = self._last_predictions # Cached by the tournament
+        elif hasattr(self.model, 'predict'):
+            # One reindex: features the frame lacks arrive as 0 instead of raising
+            X = np.array(df.reindex(columns=features, fill_value=0), dtype=np.float32, order='C')
+            np.nan_to_num(X, copy=False)
             df['predicted_qty'] = self.model.predict(X)
         else:
             df['predicted_qty'] = 0
 
         matrix = []
         
-        def calc_metric(act, pred):
-            if act == 0: act = 1.0 # Prevent div/0
-            wmape = abs(act - pred) / act
-            bias = (pred - act) / act
-            return max(0, int((1 - wmape) * 100)), round(bias, 3)
+        def calc_metric(act: np.ndarray, pred: np.ndarray):
+            """Accuracy (1 - WMAPE, %) and bias for every row at once."""
+            safe_act = np.where(act == 0, 1.0, act) # Prevent div/0
+            accuracy = np.maximum(0, ((1 - np.abs(safe_act - pred) / safe_act) * 100).astype(np.int64))
+            bias = np.round((pred - safe_act) / safe_act, 3)
+            return accuracy, bias
 
         # ---------------------------------------------------------
         # AGGREGATION 1: GLOBAL (All Products, All Time)
         # ---------------------------------------------------------
-        g_acc, g_bias = calc_metric(df[Anchors.SALES_QTY].sum(), df['predicted_qty'].sum())
+        # Both columns are read once; the global totals and every level below reuse these arrays
+        act_all = np.nan_to_num(df[Anchors.SALES_QTY].to_numpy(dtype=np.float64)) # NaN sums as 0 (pandas semantics)
+        pred_all = np.nan_to_num(df['predicted_qty'].to_numpy(dtype=np.float64))
+        global_actual = float(act_all.sum())
+        global_pred = float(pred_all.sum())
+        g_acc, g_bias = calc_metric(np.array([global_actual]), np.array([global_pred]))
         matrix.append({
             "level": "Global", "group": "All", "period": "All Time",
-            "accuracy": g_acc, "bias": g_bias, 
-            "actual": float(df[Anchors.SALES_QTY].sum()), 
-            "forecast": float(df['predicted_qty'].sum())
+            "accuracy": int(g_acc[0]), "bias": float(g_bias[0]), 
+            "actual": global_actual, 
+            "forecast": global_pred
         })
 
         # ---------------------------------------------------------
         # AGGREGATION 2: DYNAMIC HIERARCHY x TIME
         # ---------------------------------------------------------
+        # Period codes are shared by every level; each level is then one integer-keyed pass
+        # (node code x period code -> bincount), same rows and order as groupby(sort=True, observed=True)
+        period_codes, period_uniques = pd.factorize(df['period'], sort=True)
+        n_periods = max(len(period_uniques), 1)
+        period_names = [period_labels[k] for k in period_uniques] if period_labels else list(period_uniques)
+        
         # We loop through user-defined levels (e.g., Division, Category)
         for level_col in levels:
             if level_col in df.columns:
-                # Group by [Hierarchy Node, Time Period]
-                grouped = df.groupby([level_col, 'period']).agg({
-                    Anchors.SALES_QTY: 'sum', 
-                    'predicted_qty': 'sum'
-                }).reset_index()
+                level_codes, level_uniques = pd.factorize(df[level_col], sort=True)
+                valid = (level_codes >= 0) & (period_codes >= 0) # groupby drops NaN keys
+                keys, inverse = np.unique(level_codes[valid] * n_periods + period_codes[valid], return_inverse=True)
+                
+                act = np.bincount(inverse, weights=act_all[valid], minlength=len(keys))
+                pred = np.bincount(inverse, weights=pred_all[valid], minlength=len(keys))
+                accuracy, bias = calc_metric(act, pred)
                 
-                for _, row in grouped.iterrows():
-                    acc, bias = calc_metric(row[Anchors.SALES_QTY], row['predicted_qty'])
-                    matrix.append({
-                        "level": level_col,          # e.g., "Category"
-                        "group": str(row[level_col]),# e.g., "Shoes"
-                        "period": row['period'],     # e.g., "2024-W01"
-                        "accuracy": acc,
-                        "bias": bias,
-                        "actual": float(row[Anchors.SALES_QTY]),
-                        "forecast": float(row['predicted_qty'])
-                    })
+                # Labels are rendered once per distinct node / week, then gathered by code
+                groups = np.asarray(level_uniques.astype(str))[keys // n_periods].tolist()
+                periods = np.asarray(period_names, dtype=object)[keys % n_periods].tolist()
+                matrix.extend(
+                    {
+                        "level": level_col,  # e.g., "Category"
+                        "group": g,          # e.g., "Shoes"
+                        "period": p,         # e.g., "2024-W01"
+                        "accuracy": a, "bias": b, "actual": x, "forecast": f
+                    }
+                    for g, p, a, b, x, f in zip(groups, periods, accuracy.tolist(), bias.tolist(), act.tolist(), pred.tolist())
+                )
 
         return matrix
 
@@ -282,19 +677,172 @@ class MLEngine:
     # 🔮 FORECASTING
     # ==============================================================================
 
+    def _get_node_state(self, node_id: str):
+        """Latest price (Product Master) and up to 7 most recent sales, oldest first."""
+        events = domain_mgr.get_events("SALES_QTY", target_id=node_id, limit=7)
+        history = [float(e['value']) for e in reversed(events)]
+        
+        price = None
+        price_col = domain_mgr.get_anchor_map("PRODUCT").get(Anchors.RETAIL_PRICE)
+        product = next((p for p in domain_mgr.get_objects("PRODUCT") if p.get('obj_id') == node_id), None)
+        if product and price_col:
+            try: price = float(product.get(price_col))
+            except (TypeError, ValueError): price = None
+        return price, history
+
     def generate_forecast(self, node_id: str, days: int = 7) -> Dict[str, Any]:
-        """Simple recursive forecast for V1."""
+        """
+        Simple recursive forecast for V1.
+        Each day's prediction feeds the next day's LAG_1 / MA_7 (same physics as the Feature Store).
+        """
         if not self.model: return {"error": "Model not trained"}
-        # Stub for V1 - logic is similar to previous file but using Anchors
-        return {"node_id": node_id, "forecast": [0]*days, "narrative": "System in Upgrade Mode."}
+        
+        price, history = self._get_node_state(node_id)
+        if price is None and not history:
+            return {"error": f"No history for {node_id}"}
+        
+        # Feature row in training order; dynamic feat_* lanes stay 0 (as fillna)
+        # One (1, F) buffer reused every step: static lanes are filled once, only the lag lanes change
+        idx_lag, idx_ma = self._feat_idx_lag, self._feat_idx_ma
+        feat = np.zeros((1, getattr(self.model, 'n_features_in_', 3)), dtype=np.float32)
+        feat[0, self._feat_idx_price] = price or 0
+        predictor = self.tl_predictor # Read once: a background compile may publish mid-forecast
+        if predictor is not None:
+            predict = lambda x: predictor.predict(tl2cgen.DMatrix(x)).ravel()
+        elif self._fast_trees is not None:
+            trees = self._fast_trees
+            predict = lambda x: (_walk_forest(x[0], *trees),)
+        elif self.onnx_sess is not None:
+            input_name = self.onnx_sess.get_inputs()[0].name
+            predict = lambda x: self.onnx_sess.run(None, {input_name: x})[0].ravel()
+        else:
+            predict = self.model.predict
+        
+        window = deque(history[-7:], maxlen=7) # Appending slides the window in place
+        predictions = []
+        # Skip sklearn's per-call finiteness scan (the buffer is built here from finite values)
+        with config_context(assume_finite=True):
+            for _ in range(days):
+                feat[0, idx_lag] = window[-1] if window else 0                # LAG_1
+                feat[0, idx_ma] = sum(window) / 7 if len(window) == 7 else 0  # MA_7 (NaN until 7 days, filled 0)
+                pred_val = max(0.0, float(predict(feat)[0]))
+                predictions.append(round(pred_val, 2))
+                window.append(pred_val)
+        
+        return {
+            "node_id": node_id,
+            "forecast": predictions,
+            "model_confidence": self.metrics.get("r2_score", 0),
+            "narrative": None, # Generated in the background: poll get_narrative(narrative_id)
+            "narrative_id": self._submit_narrative(node_id, predictions)
+        }
+
+    def generate_forecast_narrative(self, node_id: str, predictions: List[float]) -> str:
+        """Analyst lane: a short plain-language read of the forecast."""
+        trend = "stable"
+        if predictions[-1] > predictions[0] * 1.05: trend = "growing"
+        elif predictions[-1] < predictions[0] * 0.95: trend = "declining"
+        
+        # Near-identical outlooks read the same: reuse the narrative instead of another LLM call.
+        # The key covers every prompt input (horizon, trend, the head it quotes), rounded to whole units
+        key = (node_id, trend, len(predictions), tuple(round(p) for p in predictions[:5]), round(predictions[-1]))
+        with self._narratives_lock:
+            if key in self._narrative_memo:
+                self._narrative_memo.move_to_end(key)
+                return self._narrative_memo[key]
+        
+        prompt = NARRATIVE_PROMPT.format(
+            node_id=node_id, days=len(predictions), trend=trend,
+            head=", ".join(f"{p:.2f}" for p in predictions[:5])
+        )
+        narrative = sovereign_brain.generate(prompt, role="analyst")
+        if not narrative.startswith('{"error"'): # Never pin an offline-node reply
+            with self._narratives_lock:
+                self._narrative_memo[key] = narrative
+                while len(self._narrative_memo) > NARRATIVE_MEMO_SIZE:
+                    self._narrative_memo.popitem(last=False)
+        return narrative
+
+    def _submit_narrative(self, node_id: str, predictions: List[float]) -> Optional[str]:
+        """Queues the analyst narrative; None when there is nothing to narrate or the lane is saturated."""
+        if not predictions: return None # days=0: no outlook to describe
+        with self._narratives_lock:
+            if sum(not f.done() for f in self._narratives.values()) >= MAX_PENDING_NARRATIVES:
+                logger.warning("⚠️ [ML] Narrative queue full, serving forecast without analysis.")
+                return None
+            narrative_id = uuid.uuid4().hex[:12]
+            self._narratives[narrative_id] = self._narrative_pool.submit(self.generate_forecast_narrative, node_id, predictions)
+            while len(self._narratives) > NARRATIVE_CACHE_SIZE:
+                self._narratives.popitem(last=False)
+        return narrative_id
+
+    def get_narrative(self, narrative_id: str, timeout: float = 0) -> Dict[str, Any]:
+        """Status is 'ready', 'pending' (still generating after `timeout` seconds), 'failed' or 'unknown'."""
+        future = self._narratives.get(narrative_id)
+        if future is None:
+            return {"narrative_id": narrative_id, "status": "unknown", "narrative": None}
+        try:
+            narrative = future.result(timeout=timeout)
+        except FutureTimeout:
+            return {"narrative_id": narrative_id, "status": "pending", "narrative": None}
+        except Exception as e: # The worker's error: report it, don't fail the poll
+            logger.warning(f"⚠️ [ML] Narrative {narrative_id} failed: {type(e).__name__}: {e}")
+            return {"narrative_id": narrative_id, "status": "failed", "narrative": None}
+        return {"narrative_id": narrative_id, "status": "ready", "narrative": narrative}
 
     def get_metrics(self) -> Dict:
+        # Pick up a retrain done by another worker process
+        try:
+            mtime = os.stat(self.metrics_path).st_mtime_ns
+        except OSError:
+            return self.metrics
+        if mtime != self._metrics_mtime:
+            self._load_model()
         return self.metrics
 
+    def _read_artifact(self, path: str, default):
+        """Parsed JSON artifact; steady state costs one stat() until the file changes."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return default
+        cached = self._artifact_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, 'rb') as f: data = _json_loads(f.read())
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning(f"⚠️ [ML] Ignoring unreadable artifact {path}: {e}")
+            data = default
+        self._artifact_cache[path] = (mtime, data)
+        return data
+
     def get_accuracy_matrix(self) -> List[Dict]:
-        if os.path.exists(self.accuracy_matrix_path):
-            with open(self.accuracy_matrix_path, 'r') as f: return json.load(f)
-        return []
+        return self._read_artifact(self.accuracy_matrix_path, [])
+
+    def get_audit_log(self) -> Dict:
+        return self._read_artifact(self.audit_log_path, {})
+
+# Singleton (built on first use: importing this module must not deserialize the champion)
+@functools.lru_cache(maxsize=1)
+def get_ml_engine() -> MLEngine:
+    return MLEngine()
+
+class _LazyEngine:
+    """Forwards every attribute to the real engine, constructing it on first access."""
+    def __getattr__(self, name):
+        return getattr(get_ml_engine(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_ml_engine(), name, value)
+
+    def __bool__(self):
+        """False when the engine cannot be built, so `if not ml_engine` guards still degrade gracefully."""
+        try:
+            get_ml_engine() # A failure isn't cached: the next check retries
+            return True
+        except Exception as e:
+            logger.error(f"🔥 [ML] Engine unavailable: {type(e).__name__}: {e}")
+            return False
 
-# Singleton
-ml_engine = MLEngine()
+ml_engine = _LazyEngine()
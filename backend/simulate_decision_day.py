@@ -1,7 +1,7 @@
 import os
+import io
+import itertools
 import json
-import random
-import uuid
 import logging
 from datetime import datetime, timedelta
 import numpy as np
@@ -15,6 +15,13 @@ except ImportError:
     POSTGRES_AVAILABLE = False
     import sqlite3
 
+# --- OPTIONAL JIT (the inventory kernel runs interpreted without it) ---
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return args[0] if args and callable(args[0]) else (lambda fn: fn)
+
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("SIMULATION_ENGINE")
@@ -23,6 +30,13 @@ logger = logging.getLogger("SIMULATION_ENGINE")
 DAYS_HISTORY = 400
 START_DATE = datetime.now() - timedelta(days=DAYS_HISTORY)
 DATABASE_URL = os.environ.get("DATABASE_URL")
+RNG = np.random.default_rng(42) # One seeded PCG64 stream for every draw: reproducible universes
+
+# Event provenance: identical for every event of a kind, so serialized once
+META_SYSTEM = json.dumps({"source": "SYSTEM"})
+META_POS = json.dumps({"source": "POS"})
+META_WMS = json.dumps({"source": "WMS"})
+META_CRAWLER = json.dumps({"source": "CRAWLER"})
 
 def get_db_connection():
     """Factory to get the correct DB connection."""
@@ -116,6 +130,67 @@ CATALOG = [
     }
 ]
 
+# --- 2. SCENARIO DISPATCH TABLE (one row per DNA, indexed by DNA code) ---
+DNA_NAMES = ["VIRAL_SPIKE", "SUPPLY_SHOCK", "PHANTOM", "LOSS_LEADER", "INELASTIC",
+             "BROKEN_SIZE", "BRAND_EQUITY", "OMNI_RESCUE", "DEFAULT"]
+DNA_CODE = {name: code for code, name in enumerate(DNA_NAMES)}
+VIRAL, PHANTOM, BRAND_EQUITY = DNA_CODE["VIRAL_SPIKE"], DNA_CODE["PHANTOM"], DNA_CODE["BRAND_EQUITY"]
+DNA_MU = np.array([10.0, 25.0, 0.0, 30.0, 20.0, 0.0, 0.5, 40.0, 10.0])  # Daily demand mean (Poisson rate for BRAND_EQUITY)
+DNA_SIGMA = np.array([2.0, 5.0, 0.0, 5.0, 2.0, 0.0, 0.0, 5.0, 0.0])
+DNA_WEEKEND = np.array([True, True, False, True, True, False, True, True, True])  # 1.4x weekend bump
+DNA_REPLENISHES = np.array([True, True, False, True, True, False, False, False, True])  # Restock 200 below 50
+DNA_PRICE_HIKE = np.array([0.0, 0.0, 0.0, 0.0, 5.0, 0.0, 0.0, 0.0, 0.0])  # Added over the last 30 days
+DNA_COMP_RATE = np.array([0.0, 0.0, 0.0, 0.15, 0.0, 0.0, 0.0, 0.0, 0.0])  # Daily odds of a competitor price sighting
+VIRAL_WINDOW, VIRAL_MU, VIRAL_SIGMA = 7, 150.0, 20.0
+COMP_PRICE = 30.0
+
+# --- 3. STRUCT-OF-ARRAYS CATALOG (columns for the scenario engine; setup_catalog serializes the dicts) ---
+OPENING_STOCK = {"PUMA-ESS-TEE-BLK": 5, "PUMA-RSX-PREPPY": 150, "FERRARI-RACE-JKT": 80, "MB-03-TOXIC": 0} # Others open at 200
+SKU_IDS = [item['id'] for item in CATALOG]
+SKU_DNA = [item['attributes']['dna'] for item in CATALOG]
+SKU_DNA_CODE = np.array([DNA_CODE.get(dna, DNA_CODE["DEFAULT"]) for dna in SKU_DNA], dtype=np.int8)
+SKU_BASE_PRICE = np.array([item['base_price'] for item in CATALOG])
+SKU_OPENING_STOCK = np.array([OPENING_STOCK.get(sku, 200) for sku in SKU_IDS], dtype=np.int64)
+
+def event_ids(prefix: str = "SIM-"):
+    """
+    Sequential event ids. The seed rebuild starts from an empty event table, so ids only
+    need to be unique within the run; the prefix keeps them apart from ingested/derived ids.
+    """
+    return (f"{prefix}{n:08d}" for n in itertools.count())
+
+def copy_field(value) -> str:
+    """Escapes one value for Postgres COPY text format."""
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+@njit(cache=True)
+def simulate_inventory(demand, opening_stock, phantom, replenishes, threshold=50, restock=200):
+    """
+    Stateful stock physics for every SKU (columns) over the calendar (rows): sales capped
+    by stock, then replenishment. Returns (sales, snapshot), both shaped like demand.
+    """
+    n_days, n_skus = demand.shape
+    sales = np.zeros((n_days, n_skus), dtype=np.int64)
+    snapshot = np.zeros((n_days, n_skus), dtype=np.int64)
+    stock = opening_stock.copy()
+    for d in range(n_days):
+        for j in range(n_skus):
+            if not phantom[j]:
+                sales[d, j] = min(demand[d, j], stock[j])
+            stock[j] -= sales[d, j]
+            snapshot[d, j] = 5 if phantom[j] else stock[j]
+            if replenishes[j] and stock[j] < threshold:
+                stock[j] += restock
+    return sales, snapshot
+
+def tune_bulk_session(conn):
+    """
+    SQLite only, this connection only: fewer fsyncs per commit (synchronous=NORMAL) and temp
+    tables/sorts in memory. The journal mode is stored in the ledger file itself, so it is left
+    as the app configured it and nothing outlives the seed run.
+    """
+    conn.executescript("PRAGMA synchronous = NORMAL; PRAGMA temp_store = MEMORY;")
+
 def clean_slate(conn):
     """
     CRITICAL FIX: Deletes data in the correct order to respect Foreign Keys.
@@ -128,7 +203,6 @@ def clean_slate(conn):
     cursor.execute("DELETE FROM universal_events")
     # DELETE PARENTS SECOND
     cursor.execute("DELETE FROM universal_objects WHERE obj_type='PRODUCT'")
-    conn.commit()
     logger.info("✨ Clean slate achieved.")
 
 def setup_catalog(conn):
@@ -147,91 +221,57 @@ def setup_catalog(conn):
         execute_batch(cursor, query, data)
     else:
         cursor.executemany(query, data)
+
+# --- 4. THE SIMULATOR ENGINE ---
+
+def iter_events(date_strs, prices, sales, snapshots, comp_sightings):
+    """Event rows SKU by SKU, produced as the bulk writer pulls them."""
+    next_id = event_ids().__next__
+    for j, sku in enumerate(SKU_IDS):
+        for d in np.flatnonzero(comp_sightings[:, j]):
+            yield (next_id(), sku, "COMP_PRICE", COMP_PRICE, date_strs[d], META_CRAWLER)
         
-    conn.commit()
+        for date_str, price, qty, snapshot_qty in zip(date_strs, prices[:, j].tolist(), sales[:, j].tolist(), snapshots[:, j].tolist()):
+            yield (next_id(), sku, "PRICE", price, date_str, META_SYSTEM)
+            if qty > 0:
+                yield (next_id(), sku, "SALES_QTY", qty, date_str, META_POS)
+            yield (next_id(), sku, "INV_SNAPSHOT", snapshot_qty, date_str, META_WMS)
 
-# --- 2. THE SIMULATOR ENGINE ---
+        logger.info(f"   ... Simulated {sku} ({SKU_DNA[j]})")
 
 def generate_events(conn):
     logger.info("📈 Generating Retail Reality...")
-    events = []
-    
-    # Inventory State
-    inv = {item['id']: 200 for item in CATALOG}
-    inv["PUMA-ESS-TEE-BLK"] = 5 
-    inv["PUMA-RSX-PREPPY"] = 150
-    inv["FERRARI-RACE-JKT"] = 80
-    inv["MB-03-TOXIC"] = 0
-
     cursor = conn.cursor()
 
-    for day_offset in range(DAYS_HISTORY + 1):
-        curr_date = START_DATE + timedelta(days=day_offset)
-        date_str = curr_date.strftime("%Y-%m-%d")
-        
-        is_weekend = curr_date.weekday() >= 5
-        days_from_now = (datetime.now() - curr_date).days
-
-        for item in CATALOG:
-            sku = item['id']
-            dna = item['attributes']['dna']
-            price = item['base_price']
-            
-            # --- SCENARIO LOGIC ---
-            if dna == "VIRAL_SPIKE":
-                base_demand = np.random.normal(10, 2)
-                if days_from_now < 7: base_demand = np.random.normal(150, 20) 
-            elif dna == "SUPPLY_SHOCK":
-                base_demand = np.random.normal(25, 5) 
-            elif dna == "PHANTOM":
-                base_demand = 0 
-            elif dna == "LOSS_LEADER":
-                base_demand = np.random.normal(30, 5)
-                if random.random() < 0.15:
-                    comp_price = 30.0
-                    events.append((str(uuid.uuid4()), sku, "COMP_PRICE", comp_price, date_str, json.dumps({"source":"CRAWLER"})))
-            elif dna == "INELASTIC":
-                if days_from_now < 30: price += 5.0 
-                base_demand = np.random.normal(20, 2)
-            elif dna == "BROKEN_SIZE":
-                base_demand = 0 
-            elif dna == "BRAND_EQUITY":
-                base_demand = np.random.poisson(0.5)
-            elif dna == "OMNI_RESCUE":
-                base_demand = np.random.normal(40, 5)
-            else:
-                base_demand = 10
-
-            # Physics
-            if is_weekend and dna not in ["PHANTOM", "BROKEN_SIZE"]:
-                base_demand *= 1.4
-
-            sales = max(0, int(base_demand))
-            
-            if dna == "PHANTOM":
-                sales = 0
-            elif inv[sku] < sales:
-                sales = inv[sku]
-            
-            inv[sku] -= sales
-            
-            # --- LOG EVENTS ---
-            events.append((str(uuid.uuid4()), sku, "PRICE", price, date_str, json.dumps({"source":"SYSTEM"})))
-            
-            if sales > 0:
-                events.append((str(uuid.uuid4()), sku, "SALES_QTY", sales, date_str, json.dumps({"source":"POS"})))
-            
-            snapshot_qty = 5 if dna == "PHANTOM" else inv[sku]
-            events.append((str(uuid.uuid4()), sku, "INV_SNAPSHOT", snapshot_qty, date_str, json.dumps({"source":"WMS"})))
+    # Calendar, computed once and shared by every SKU
+    n_days = DAYS_HISTORY + 1
+    days = np.datetime64(START_DATE.date(), 'D') + np.arange(n_days)
+    date_strs = np.datetime_as_string(days).tolist() # ISO 'YYYY-MM-DD', rendered in one call
+    is_weekend = (days.astype(np.int64) + 3) % 7 >= 5 # Epoch day 0 was a Thursday (Monday = 0)
+    days_from_now = np.arange(DAYS_HISTORY, -1, -1) # START_DATE is exactly DAYS_HISTORY days back
 
-            # Replenishment
-            if dna not in ["PHANTOM", "BROKEN_SIZE", "BRAND_EQUITY", "OMNI_RESCUE"] and inv[sku] < 50:
-                inv[sku] += 200
+    # --- SCENARIO LOGIC (every SKU x day drawn at once, parameters gathered by DNA code) ---
+    n_skus = len(SKU_IDS)
+    codes = SKU_DNA_CODE
+    noise = RNG.standard_normal((n_days, n_skus))
+    base_demand = DNA_MU[codes] + DNA_SIGMA[codes] * noise
+    viral = (days_from_now < VIRAL_WINDOW)[:, None] & (codes == VIRAL)
+    base_demand[viral] = VIRAL_MU + VIRAL_SIGMA * noise[viral]
+    poisson = codes == BRAND_EQUITY
+    base_demand[:, poisson] = RNG.poisson(DNA_MU[codes[poisson]], (n_days, int(poisson.sum())))
+    
+    # Physics
+    base_demand[is_weekend[:, None] & DNA_WEEKEND[codes]] *= 1.4
+    demand = np.maximum(0, base_demand.astype(np.int64)) # int() truncation, floored at 0
+    
+    prices = SKU_BASE_PRICE + np.where((days_from_now < 30)[:, None], DNA_PRICE_HIKE[codes], 0.0)
+    comp_sightings = RNG.random((n_days, n_skus)) < DNA_COMP_RATE[codes]
 
-        if day_offset % 50 == 0:
-            logger.info(f"   ... Processed {date_str}")
+    # Inventory is stateful (stock-outs, replenishment): sequential in time, so it runs in the JIT kernel
+    sales, snapshots = simulate_inventory(demand, SKU_OPENING_STOCK, codes == PHANTOM, DNA_REPLENISHES[codes])
 
-    logger.info(f"💾 Committing {len(events)} events to database...")
+    logger.info("💾 Streaming events to database...")
+    events = iter_events(date_strs, prices, sales, snapshots, comp_sightings)
     
     ph = get_placeholder() # ? or %s
     query = f"""
@@ -241,11 +281,30 @@ def generate_events(conn):
     """
     
     if DATABASE_URL and POSTGRES_AVAILABLE:
-        execute_batch(cursor, query, events, page_size=1000)
+        # COPY streams the rows in one round trip, with no per-row parameter binding.
+        # Indexes stay: on the partitioned table their DDL can't be replayed as read back.
+        buf = io.StringIO()
+        buf.writelines("\t".join(map(copy_field, row)) + "\n" for row in events)
+        buf.seek(0)
+        cursor.copy_expert(
+            "COPY universal_events (event_id, primary_target_id, event_type, value, timestamp, meta) FROM STDIN",
+            buf
+        )
+        written = cursor.rowcount
     else:
-        cursor.executemany(query, events)
-    
-    conn.commit()
+        # Secondary indexes are rebuilt once after the load instead of updated on every row
+        # (PK/UNIQUE autoindexes have no SQL and stay). The drop runs inside the rebuild
+        # transaction: a failed load rolls it back with everything else.
+        indexes = cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'universal_events' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+        cursor.executemany(query, events) # Consumes the generator lazily: no full row list in memory
+        written = cursor.rowcount # Before the index DDL below resets it
+        for _, sql in indexes:
+            cursor.execute(sql)
+    logger.info(f"💾 Wrote {written} events.")
 
 if __name__ == "__main__":
     try:
@@ -256,10 +315,14 @@ if __name__ == "__main__":
             logger.info("🔌 Connecting to SQLite (Local)...")
             
         with get_db_connection() as conn:
+            if not (DATABASE_URL and POSTGRES_AVAILABLE):
+                tune_bulk_session(conn)
+            # One transaction for the whole rebuild: a failure leaves the previous universe intact
             # [FIX] Added clean_slate to handle FK constraints
             clean_slate(conn)
             setup_catalog(conn)
             generate_events(conn)
+            conn.commit()
         logger.info("\n✅ SIMULATION COMPLETE. The World is Ready.")
     except Exception as e:
         logger.error(f"\n❌ FATAL ERROR: {e}")
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { TrendingUp, Activity, Zap, GitCommit, RefreshCw, AlertTriangle, PlayCircle, MessageSquare, MousePointerClick } from 'lucide-react';
 // [FIX] Adjusted import paths from '../..' to '..'
 import { PlanningScope } from '../types';
@@ -13,6 +13,8 @@ export const ForecastWorkbench: React.FC<ForecastWorkbenchProps> = ({ scope }) =
   const [confidence, setConfidence] = useState<number>(0);
   const [narrative, setNarrative] = useState<string>("");
   const [loading, setLoading] = useState(false);
+  const [narrativeLoading, setNarrativeLoading] = useState(false);
+  const latestNarrativeId = useRef<string | null>(null);
   const [trainLoading, setTrainLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
@@ -22,12 +24,32 @@ export const ForecastWorkbench: React.FC<ForecastWorkbenchProps> = ({ scope }) =
   const activeNode = scope.nodeId;
   const isSkuLevel = scope.nodeId && scope.nodeId !== 'All';
 
+  // The analyst narrative is generated after the forecast returns; poll until it lands
+  const pollNarrative = async (narrativeId: string) => {
+    latestNarrativeId.current = narrativeId;
+    setNarrativeLoading(true);
+    for (let attempt = 0; attempt < 60; attempt++) {
+      const res = await api.intelligence.getNarrative(narrativeId);
+      if (latestNarrativeId.current !== narrativeId) return; // A newer forecast took over
+      if (res.status !== "pending") {
+        setNarrative(res.narrative || "No analysis available.");
+        setNarrativeLoading(false);
+        return;
+      }
+      await new Promise(resolve => setTimeout(resolve, 2000));
+    }
+    setNarrative("No analysis available.");
+    setNarrativeLoading(false);
+  };
+
   const fetchLiveForecast = async () => {
     if (!activeNode || activeNode === 'All') return;
 
     setLoading(true);
     setError(null);
     setNarrative(""); 
+    latestNarrativeId.current = null;
+    setNarrativeLoading(false);
     
     try {
         // [UPDATED] Dynamic Call using activeNode
@@ -40,7 +62,11 @@ export const ForecastWorkbench: React.FC<ForecastWorkbenchProps> = ({ scope }) =
         } else {
             setForecastData(data.forecast || []);
             setConfidence(data.confidence_score || data.model_confidence || 0);
-            setNarrative(data.narrative || "No analysis available.");
+            if (data.narrative_id) {
+                pollNarrative(data.narrative_id);
+            } else {
+                setNarrative(data.narrative || "No analysis available.");
+            }
         }
     } catch (err) {
         console.error(err);
@@ -150,7 +176,7 @@ export const ForecastWorkbench: React.FC<ForecastWorkbenchProps> = ({ scope }) =
                       <span className="text-indigo-300 text-xs font-bold uppercase tracking-wider">Analyst Note</span>
                   </div>
                   <p className="text-slate-300 text-sm leading-relaxed min-h-[40px]">
-                      {loading ? (
+                      {loading || narrativeLoading ? (
                           <span className="animate-pulse text-slate-500">Consulting Sovereign Brain...</span>
                       ) : narrative ? (
                           narrative
@@ -237,6 +237,13 @@ export const api = {
         const res = await client.get(`/ml/predict?sku=${sku}&days=${days}`);
         return res.data;
       } catch (e) { return { forecast: [] }; }
+    },
+
+    getNarrative: async (narrativeId: string) => {
+      try {
+        const res = await client.get(`/ml/narrative/${narrativeId}`);
+        return res.data;
+      } catch (e) { return { status: "unknown", narrative: null }; }
     }
   },
 
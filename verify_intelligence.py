@@ -1,6 +1,6 @@
 import sys
 import os
-import uuid
+import json
 import pandas as pd
 import logging
 
@@ -47,21 +47,20 @@ def setup_data():
     # Add Objects
     for p in PRODUCTS:
         domain_mgr.add_node(p['sku'], p['name'], "PRODUCT")
-        # Update attributes directly via SQL injection for speed or re-implementation of add_node needed?
-        # domain_model.add_node separates attributes.
-        # Let's cheat and insert directly to get attributes right.
-        import json
-        conn = get_db_connection(TEST_DB)
-        conn.execute(f"UPDATE universal_objects SET attributes = ? WHERE obj_id = ?", 
-                     (json.dumps(p), p['sku']))
-        conn.commit()
+    # domain_model.add_node separates attributes.
+    # Let's cheat and set them directly. One connection for the rest of the fixture:
+    # throwaway DB, so one unsynced transaction and a single commit.
+    conn = get_db_connection(TEST_DB)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executemany("UPDATE universal_objects SET attributes = ? WHERE obj_id = ?",
+                     [(json.dumps(p), p['sku']) for p in PRODUCTS])
     
     # Add Events
-    conn = get_db_connection(TEST_DB)
-    for e in EVENTS:
-        conn.execute("INSERT INTO universal_events (event_id, primary_target_id, event_type, value, timestamp) VALUES (?, ?, ?, ?, ?)",
-                     (str(uuid.uuid4()), e['sku'], "SALES_QTY", e['qty'], e['date']))
+    ids = os.urandom(16 * len(EVENTS)).hex() # One read for every random 128-bit id
+    conn.executemany("INSERT INTO universal_events (event_id, primary_target_id, event_type, value, timestamp) VALUES (?, ?, ?, ?, ?)",
+                     [(ids[32 * i:32 * i + 32], e['sku'], "SALES_QTY", e['qty'], e['date']) for i, e in enumerate(EVENTS)])
     conn.commit()
+    conn.close()
 
 def verify_pipeline():
     setup_data()
@@ -93,7 +92,6 @@ def verify_pipeline():
     # Corrupt the data (Remove Price)
     # We simulate this by nulling out the MSRP in the Objects
     conn = get_db_connection(TEST_DB)
-    import json
     new_attr = json.dumps({"sku": "P1", "name": "Shoe", "cat": "Footwear"}) # No price
     conn.execute("UPDATE universal_objects SET attributes = ?", (new_attr,))
     conn.commit()